@@ -2,7 +2,19 @@ try:
     from ._version import version as __version__
 except ImportError:
     __version__ = "unknown"
-from ._writer import write_layers
-from .convert import tmap_writer
 
 __all__ = ("write_layers", "tmap_writer")
+
+
+def __getattr__(name: str):
+    # The writers (and through them napari) are only imported on first use,
+    # such that discovering the plugin stays lightweight.
+    if name == "write_layers":
+        from ._writer import write_layers
+
+        return write_layers
+    if name == "tmap_writer":
+        from .convert import tmap_writer
+
+        return tmap_writer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
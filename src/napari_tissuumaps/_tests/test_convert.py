@@ -0,0 +1,145 @@
+import csv
+
+import numpy as np
+import tifffile
+from napari.layers import Labels
+
+from napari_tissuumaps.convert import (
+    downsample_mean,
+    generate_labels_image,
+    rgb2hex,
+    save_points_csv,
+    save_tiff,
+    tmap_writer,
+    unique_labels,
+)
+
+
+def test_rgb2hex():
+    colors = np.array(
+        [[1.0, 1.0, 1.0, 1.0], [0.0, 0.0, 0.0, 1.0], [1.0, 0.5, 0.0, 0.5]]
+    )
+    # A single color gives a single string
+    assert rgb2hex(colors[0]) == "#FFFFFF"
+    # Multiple colors are converted at once, and the alpha is ignored
+    assert rgb2hex(colors).tolist() == ["#FFFFFF", "#000000", "#FF7F00"]
+
+
+def test_points_csv(tmp_path):
+    data = np.array([[1.5, 2.0], [3.0, 4.0]])
+    meta = {
+        "name": "Points",
+        "face_color": np.array([[1.0, 0.0, 0.0, 1.0], [0.0, 0.0, 1.0, 1.0]]),
+        "symbol": "disc",
+        "properties": {
+            "score": np.array([0.1, 0.5], dtype=np.float32),
+            "count": np.array([1, 2]),
+            "valid": np.array([True, False]),
+        },
+    }
+    tmap_writer(tmp_path / "project.tmap", [(data, meta, "points")])
+    # The coordinates are swapped, and the properties are written as Python
+    # scalars, e.g. float32 values with all their digits.
+    path = tmp_path / "project.tmap" / "points" / "Points.csv"
+    assert path.read_text() == (
+        "name,x,y,color,symbol,score,count,valid\n"
+        "Points,2.0,1.5,#FF0000,disc,0.10000000149011612,1,True\n"
+        "Points,4.0,3.0,#0000FF,disc,0.5,2,False\n"
+    )
+
+
+def test_unique_labels():
+    # Labels in a small range (histogram) and in a large range (sorting)
+    for data in [
+        np.array([[0, 3, 3], [7, 0, 3]], dtype=np.uint16),
+        np.array([[-128, 127, 0], [5, 5, -128]], dtype=np.int8),
+        np.array([[0, 2**40, 5], [5, -1, 0]], dtype=np.int64),
+    ]:
+        labels, inverse = unique_labels(data)
+        assert labels.tolist() == np.unique(data).tolist()
+        np.testing.assert_array_equal(labels[inverse], data)
+
+
+def test_save_points_csv_quoting(tmp_path):
+    # Names and properties containing commas or quotes are quoted, such that
+    # the file can be read back
+    data = np.array([[0.0, 1.0], [2.0, 3.0]])
+    meta = {
+        "name": "a,b",
+        "face_color": np.ones((2, 4)),
+        "symbol": "disc",
+        "properties": {"class": np.array(["x,y", 'say "hi"'], dtype=object)},
+    }
+    path = tmp_path / "points.csv"
+    save_points_csv(path, data, meta)
+    with open(path, newline="", encoding="utf-8") as points_file:
+        rows = list(csv.reader(points_file))
+    assert rows == [
+        ["name", "x", "y", "color", "symbol", "class"],
+        ["a,b", "1.0", "0.0", "#FFFFFF", "disc", "x,y"],
+        ["a,b", "3.0", "2.0", "#FFFFFF", "disc", 'say "hi"'],
+    ]
+
+
+def test_generate_labels_image():
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 10, (20, 30)).astype(np.int32)
+    auto = Labels(data, seed=0.3)
+    direct = Labels(data, color={1: "red", 2: "blue", None: "green"})
+    direct.color_mode = "direct"
+    selected = Labels(data)
+    selected.selected_label = 3
+    selected.show_selected_label = True
+    volume = Labels(rng.integers(0, 5, (3, 10, 10)).astype(np.uint8))
+    # The exported image must match the colors of the whole layer in Napari
+    for layer in [auto, direct, selected, volume]:
+        data, meta, _ = layer.as_layer_data_tuple()
+        label_layer = Labels(data, **meta)
+        expected = label_layer.colormap.map(
+            label_layer._raw_to_displayed(data)
+        )
+        np.testing.assert_array_equal(
+            generate_labels_image(data, meta),
+            (expected * 255.0).astype(np.uint8),
+        )
+
+
+def test_downsample_mean():
+    data = np.array([[0, 2, 4], [2, 4, 8], [10, 10, 1]], dtype=np.uint8)
+    # The odd last row and column are repeated before averaging
+    np.testing.assert_array_equal(
+        downsample_mean(data), np.array([[2, 6], [10, 1]], dtype=np.uint8)
+    )
+    # Half floats are summed in a wider type, and do not overflow
+    data = np.full((3, 3), 60000.0, dtype=np.float16)
+    np.testing.assert_array_equal(downsample_mean(data), data[::2, ::2])
+
+
+def test_save_tiff(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 256, (600, 520, 3)).astype(np.uint8)
+    for downsample in ["mean", "nearest"]:
+        path = tmp_path / f"{downsample}.tif"
+        save_tiff(path, data, rgb=True, downsample=downsample)
+        with tifffile.TiffFile(path) as tif:
+            pages = list(tif.pages)
+            # The image is followed by its downsampled levels, until a level
+            # fits in a single tile
+            assert [page.shape for page in pages] == [
+                (600, 520, 3),
+                (300, 260, 3),
+                (150, 130, 3),
+            ]
+            assert [page.subfiletype for page in pages] == [0, 1, 1]
+            for page in pages:
+                assert page.is_tiled
+                assert (page.tilelength, page.tilewidth) == (256, 256)
+                # Adobe deflate (zlib), compared by its TIFF code as the
+                # enums are not exposed the same way in all tifffile versions
+                assert page.compression == 8
+            np.testing.assert_array_equal(pages[0].asarray(), data)
+            level = pages[1].asarray()
+        if downsample == "mean":
+            np.testing.assert_array_equal(level, downsample_mean(data))
+        else:
+            np.testing.assert_array_equal(level, data[::2, ::2])
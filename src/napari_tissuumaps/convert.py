@@ -2,18 +2,38 @@
 The functions are implemented such that the module can be reused in other
 context by generating pythonic versions of the data first, then saving them.
 """
+from __future__ import annotations
+
+import binascii
+import csv
 import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from logging import getLogger
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union
 
 import numpy as np
-from napari.layers.labels.labels import Labels
-from napari.types import FullLayerData
-from napari.utils.io import imsave
+import tifffile
+
+if TYPE_CHECKING:
+    from napari.types import FullLayerData
 
 logger = getLogger(__name__)
 
+# Size of the tiles of the TIFF files, in pixels
+TIFF_TILE_SIZE = 256
+# Number of threads used to compress the tiles of the TIFF files, the zlib
+# compression releases the GIL so the tiles are compressed in parallel.
+TIFF_MAX_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+# Number of layer files written at the same time. Each file being written
+# holds its own copies of the data (e.g. the colored labels and the pyramid
+# levels), so only a few are written at once to bound the memory, and they
+# share the `TIFF_MAX_WORKERS` compression threads.
+WRITER_MAX_WORKERS = 2
+
 
 def filter_type(
     layer_data: List[FullLayerData], type_filter: Union[str, List[str]]
@@ -73,63 +93,60 @@ def generate_tmap_config(
     # This function first create nested lists and dictionary to add the the
     # final dictionary in the latter part of the function.
 
-    # Generating the list of markers (points).
+    # Generating the list of markers (points), layers (images and labels) and
+    # regions (shapes) in a single pass over the layers.
     markers = []
-    for data, meta, _ in filter_type(layer_data, "points"):
-        markers.append(
-            {
-                "autoLoad": True,
-                "comment": meta["name"],
-                "expectedCSV": {
-                    "X_col": "x",
-                    "Y_col": "y",
-                    "color": "color",
-                    "group": "name",
-                    "name": "",
-                    "key": "letters",
-                },
-                "path": f"points/{meta['name']}.csv",
-                "title": f"Download markers ({meta['name']})",
-            }
-        )
-
-    # Generating the list of layers (images and labels)
     layers, layer_filters, layer_opacities, layer_visibilities = [], {}, {}, {}
+    # The same filters are used for all the layers. Each layer gets its own
+    # copy, such that the filters of a layer can be edited in the returned
+    # configuration without changing the other layers.
     default_filters = [
         {"name": "Brightness", "value": "0"},
         {"name": "Contrast", "value": "1"},
         {"name": "Color", "value": "0"},
     ]
-    regions = {}
+    regions, has_shapes = {}, False
     idx = (
         0  # Image index, keeps track of images and labels to get a consistent
     )
     # indexing in the tmap project file.
     for data, meta, layer_type in layer_data:
-        if layer_type == "image":
+        if layer_type in ("image", "labels"):
+            folder = "images" if layer_type == "image" else "labels"
             layers.append(
                 {
                     "name": meta["name"],
-                    "tileSource": f"images/{meta['name']}.tif.dzi",
+                    "tileSource": f"{folder}/{meta['name']}.tif.dzi",
                 }
             )
-            layer_filters[str(idx)] = default_filters.copy()
-            layer_opacities[str(idx)] = "{:.3f}".format(meta["opacity"])
-            layer_visibilities[str(idx)] = bool(meta["visible"])
+            key = str(idx)
+            layer_filters[key] = [dict(item) for item in default_filters]
+            layer_opacities[key] = "{:.3f}".format(meta["opacity"])
+            layer_visibilities[key] = bool(meta["visible"])
             idx += 1
-        elif layer_type == "labels":
-            layers.append(
+        elif layer_type == "points":
+            markers.append(
                 {
-                    "name": meta["name"],
-                    "tileSource": f"labels/{meta['name']}.tif.dzi",
+                    "autoLoad": True,
+                    "comment": meta["name"],
+                    "expectedCSV": {
+                        "X_col": "x",
+                        "Y_col": "y",
+                        "color": "color",
+                        "group": "name",
+                        "name": "",
+                        "key": "letters",
+                    },
+                    "path": f"points/{meta['name']}.csv",
+                    "title": f"Download markers ({meta['name']})",
                 }
             )
-            layer_filters[str(idx)] = default_filters.copy()
-            layer_opacities[str(idx)] = "{:.3f}".format(meta["opacity"])
-            layer_visibilities[str(idx)] = bool(meta["visible"])
-            idx += 1
         elif layer_type == "shapes":
-            regions.update(generate_shapes_dict(data, meta))
+            has_shapes = True
+            # The shapes are only converted if they are saved in the tmap
+            # file, otherwise the writer converts them for the regions file.
+            if internal_shapes:
+                regions.update(generate_shapes_dict(data, meta))
 
     # The final configuration to be returned, combining all the lists and
     # dictionaries generated above.
@@ -151,7 +168,7 @@ def generate_tmap_config(
             },
         ],
     }
-    if not regions:
+    if not has_shapes:
         config["regions"] = {}
     elif internal_shapes:
         config["regions"] = regions
@@ -161,6 +178,18 @@ def generate_tmap_config(
     return config
 
 
+def _unit_circle(N: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the cosines and sines of `N + 1` angles evenly spaced from 0
+    to 2 pi. The tables are read-only as they are shared between the ellipses
+    with the same number of points.
+    """
+    thetas = np.linspace(0, 2 * np.pi, N + 1)
+    cos, sin = np.cos(thetas), np.sin(thetas)
+    cos.flags.writeable = False
+    sin.flags.writeable = False
+    return cos, sin
+
+
 def generate_shapes_dict(
     data: FullLayerData, meta: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -184,10 +213,25 @@ def generate_shapes_dict(
         Tissuumaps.
     """
     shape_dict = {"type": "FeatureCollection", "features": []}
-    for i, shape in enumerate(data):
-        shape_type = meta["shape_type"][i]
-        shape_name = meta["name"] + f"_{shape_type}_{i+1}"
-        shape_color = (255 * meta["face_color"][i, :3]).astype(int).tolist()
+    # The colors of all the shapes are converted at once
+    shape_colors = (255 * np.asarray(meta["face_color"])[:, :3]).astype(int)
+    shape_colors = shape_colors.tolist()
+    # Array properties are converted to lists once and indexed per shape,
+    # other properties are copied as they are
+    properties = meta.get("properties", {})
+    property_lists = {
+        prop: value.tolist()
+        for prop, value in properties.items()
+        if isinstance(value, np.ndarray)
+    }
+    # The unit circles are shared by the ellipses with the same number of
+    # points, and only kept for the duration of the export of the layer
+    unit_circles: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    # The per-shape metadata is iterated alongside the shapes
+    name = meta["name"]
+    shapes_meta = zip(data, meta["shape_type"], shape_colors)
+    for i, (shape, shape_type, shape_color) in enumerate(shapes_meta):
+        shape_name = f"{name}_{shape_type}_{i+1}"
         # We enumerate each shapes that appear in the layer
         subshape_dict = {
             "type": "Feature",
@@ -199,7 +243,9 @@ def generate_shapes_dict(
                 "isLocked": False,
             },
         }
-        # Different shapes have different points to draw
+        # Different shapes have different points to draw. The columns are
+        # swapped due to conventional differences between Napari (y, x) and
+        # TissUUmaps (x, y)
         points_to_draw = []
         if shape_type == "ellipse":
             assert isinstance(shape, np.ndarray)
@@ -218,53 +264,355 @@ def generate_shapes_dict(
             # is approximated and compute the arc based on a circle with the
             # radius being equal to the longest axis of the ellipse.
             minimum_arc_distance = 3.0
-            max_axis = np.maximum(np.abs(ellipse_a), np.abs(ellipse_b))
-            N = np.maximum(
-                int(np.ceil(2.0 * np.pi * max_axis / minimum_arc_distance)), 10
+            max_axis = max(abs(ellipse_a), abs(ellipse_b))
+            N = max(
+                math.ceil(2.0 * math.pi * max_axis / minimum_arc_distance), 10
             )
-            thetas = np.linspace(0, 2 * np.pi, N + 1)
+            if N not in unit_circles:
+                unit_circles[N] = _unit_circle(N)
+            cos, sin = unit_circles[N]
             points_to_draw = np.stack(
                 [
-                    ellipse_a * np.cos(thetas) + ellipse_center[0],
-                    ellipse_b * np.sin(thetas) + ellipse_center[1],
+                    ellipse_b * sin + ellipse_center[1],
+                    ellipse_a * cos + ellipse_center[0],
                 ],
                 axis=-1,
             )
         elif shape_type == "line" or shape_type == "path":
             assert isinstance(shape, np.ndarray)
-            points_to_draw = np.vstack([shape, shape[-2::-1]])
+            # The lines are closed by going back along their points, which
+            # are written swapped in a single buffer.
+            n_points = len(shape)
+            points_to_draw = np.empty((2 * n_points - 1, 2), shape.dtype)
+            points_to_draw[:n_points] = shape[:, 1::-1]
+            points_to_draw[n_points:] = shape[-2::-1, 1::-1]
         else:  # shape_type == "polygon" or shape_type == "rectangle"
             assert isinstance(shape, np.ndarray)
-            points_to_draw = shape
+            points_to_draw = shape[:, 1::-1]
 
-        # The columns are swapped due to conventional differences between
-        # Napari (y, x) and TissUUmaps (x, y)
-        coordinates = points_to_draw[:, [1, 0]].tolist()
+        coordinates = points_to_draw.tolist()
         subshape_dict["geometry"]["coordinates"] = [[coordinates]]
         # Adding the properties, if there are any
-        properties = meta.get("properties", {}).copy()
-        for prop in properties:
-            if isinstance(properties[prop], np.ndarray):
-                properties[prop] = properties[prop].tolist()[i]
-        subshape_dict["properties"]["extra"] = properties
+        subshape_dict["properties"]["extra"] = {
+            prop: property_lists[prop][i] if prop in property_lists else value
+            for prop, value in properties.items()
+        }
         # We add it to the full dict
         shape_dict["features"].append(subshape_dict)
     return shape_dict
 
 
-def rgb2hex(color_vec: np.ndarray) -> str:
+def unique_labels(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Finds the unique labels of a labels image, and the index of the label
+    of each pixel in the list of unique labels.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The labels layer data (an integer image) as provided by Napari.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The sorted unique labels, and an array of the same shape as `data`
+        such that `labels[inverse]` is equal to `data`.
+    """
+    if np.issubdtype(data.dtype, np.integer) and data.size > 0:
+        low, high = data.min(), data.max()
+        # The range is computed with Python integers, which cannot overflow.
+        # Like napari does for its color lookup tables, the histogram is only
+        # used as long as its tables (the counts and the index of each label,
+        # 16 bytes per label) take fewer bytes than the image, or than 1 MiB
+        # for small images.
+        table_nbytes = (int(high) - int(low) + 1) * 16
+        if table_nbytes <= max(data.nbytes, 2**20):
+            # For labels spanning a small range, a histogram finds the labels
+            # in a single linear pass instead of sorting the whole image. The
+            # labels are offset by the smallest one, such that negative or
+            # large labels take this path as well.
+            offsets = data
+            if low != 0:
+                signed = np.issubdtype(data.dtype, np.signedinteger)
+                offsets = np.subtract(
+                    data, low, dtype=np.int64 if signed else data.dtype
+                )
+            offsets = offsets.astype(np.intp, copy=False)
+            counts = np.bincount(offsets.ravel())
+            present = np.flatnonzero(counts)
+            index = np.zeros(len(counts), dtype=np.intp)
+            index[present] = np.arange(len(present))
+            return present.astype(data.dtype) + low, index[offsets]
+    labels, inverse = np.unique(data, return_inverse=True)
+    return labels, inverse.reshape(data.shape)
+
+
+def generate_labels_image(
+    data: np.ndarray, meta: Dict[str, Any]
+) -> np.ndarray:
+    """Generates the colored image of a labels layer, as displayed in Napari.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The labels layer data (an integer image) as provided by Napari.
+    meta : Dict[str, Any]
+        The metadata of the labels layer containing the colormap information.
+
+    Returns
+    -------
+    np.ndarray
+        The RGBA image of the labels as an array of uint8, with an additional
+        last dimension for the color channels.
+    """
+    # Napari is imported here, as the labels are the only layers that need it.
+    from napari.layers.labels.labels import Labels
+
+    # The color of a pixel only depends on its label, so only the unique
+    # labels are mapped and the image is built by indexing, directly in uint8,
+    # without the intermediate float image. The colors do not depend on the
+    # image either, so the layer is created from a single pixel to avoid
+    # computing its thumbnail and contrast limits on the whole image.
+    label_layer = Labels(np.zeros((1,) * data.ndim, data.dtype), **meta)
+    labels, inverse = unique_labels(data)
+    lut = label_layer.colormap.map(label_layer._raw_to_displayed(labels))
+    lut_uint8 = (lut * 255.0).astype(np.uint8)
+    return np.take(lut_uint8, inverse, axis=0)
+
+
+def rgb2hex(color_vec: np.ndarray) -> Union[str, np.ndarray]:
     """Transforms an array of floats into a hex color string (#xxxxxx).
+    The conversion is vectorized, such that a whole array of colors can be
+    converted at once.
 
     Parameters
     ----------
     color_vec : np.ndarray
-        A numpy array of three rgb components.
+        A numpy array of three rgb components, or an array of shape (N, 3)
+        containing one color per row. Additional components (e.g. alpha) are
+        ignored.
     Returns
     -------
-    str
-        The color as a string in hex format.
+    Union[str, np.ndarray]
+        The color as a string in hex format, or an array of N strings if
+        multiple colors were provided.
     """
-    return "#" + "".join([f"{int(c*255):02X}" for c in color_vec[:3]])
+    rgb = (np.asarray(color_vec)[..., :3] * 255).astype(np.uint8)
+    # The bytes of all the colors are converted to hexadecimal digits at once,
+    # then written in a buffer of 7 characters per color after a "#".
+    digits = np.frombuffer(binascii.hexlify(rgb.tobytes()).upper(), "S1")
+    chars = np.empty(rgb.shape[:-1] + (7,), dtype="S1")
+    chars[..., 0] = b"#"
+    chars[..., 1:] = digits.reshape(rgb.shape[:-1] + (6,))
+    hex_colors = chars.view("S7")[..., 0].astype(str)
+    return str(hex_colors) if hex_colors.ndim == 0 else hex_colors
+
+
+def _average(views: List[np.ndarray], dtype: np.dtype) -> np.ndarray:
+    """Averages arrays of the same shape, summing them in `dtype` and
+    rounding the result to the nearest integer for integer types.
+    """
+    total = views[0].astype(dtype)
+    for view in views[1:]:
+        total += view
+    if np.issubdtype(dtype, np.integer):
+        total += len(views) // 2
+        total //= len(views)
+    else:
+        total /= len(views)
+    return total
+
+
+def downsample_mean(data: np.ndarray) -> np.ndarray:
+    """Downsamples an image by a factor of 2 along its first two dimensions,
+    by averaging blocks of 2x2 pixels. Odd sizes are handled as if the last
+    row or column was repeated, such that the result has the same size as
+    `data[::2, ::2]`.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        The image to downsample, with optional color channels in the last
+        dimension.
+
+    Returns
+    -------
+    np.ndarray
+        The downsampled image, with the same dtype as `data`.
+    """
+    # The pixels are summed in a type that cannot overflow, e.g. uint8 images
+    # are summed in int16, and floats in at least float32.
+    if np.issubdtype(data.dtype, np.integer) and data.dtype.itemsize < 8:
+        dtype = np.promote_types(data.dtype, f"i{2 * data.dtype.itemsize}")
+    elif np.issubdtype(data.dtype, np.floating):
+        dtype = np.promote_types(data.dtype, np.float32)
+    else:
+        dtype = np.float64
+    height, width = data.shape[0] // 2, data.shape[1] // 2
+    pooled = np.empty(
+        (height + data.shape[0] % 2, width + data.shape[1] % 2)
+        + data.shape[2:],
+        dtype=dtype,
+    )
+    # The even part of the image is averaged from strided views, without
+    # copying it. The pixels of the odd last row or column are averaged by
+    # pairs, which is the same as repeating them.
+    even = data[: 2 * height, : 2 * width]
+    pooled[:height, :width] = _average(
+        [
+            even[0::2, 0::2],
+            even[1::2, 0::2],
+            even[0::2, 1::2],
+            even[1::2, 1::2],
+        ],
+        dtype,
+    )
+    if data.shape[1] % 2:
+        column = data[: 2 * height, -1]
+        pooled[:height, -1] = _average([column[0::2], column[1::2]], dtype)
+    if data.shape[0] % 2:
+        row = data[-1, : 2 * width]
+        pooled[-1, :width] = _average([row[0::2], row[1::2]], dtype)
+        if data.shape[1] % 2:
+            pooled[-1, -1] = data[-1, -1]
+    if np.issubdtype(dtype, np.floating) and not np.issubdtype(
+        data.dtype, np.floating
+    ):
+        # Rounding to the nearest integer for the types summed as floats
+        pooled = np.rint(pooled)
+    return pooled.astype(data.dtype, copy=False)
+
+
+def save_tiff(
+    path: Union[Path, str],
+    data: np.ndarray,
+    rgb: bool,
+    downsample: str = "mean",
+    maxworkers: int = TIFF_MAX_WORKERS,
+) -> None:
+    """Saves an image as a tiled and compressed TIFF file.
+    The tiled layout lets TissUUmaps generate the deep zoom tiles without
+    reading the whole image at once. Two-dimensional images are saved as
+    pyramids: the following pages of the file contain the image downsampled
+    by successive factors of 2, until it fits in a single tile.
+
+    Parameters
+    ----------
+    path : Union[Path, str]
+        The path of the TIFF file to write.
+    data : np.ndarray
+        The image to save. If `rgb` is True, the last dimension contains the
+        color channels (RGB or RGBA).
+    rgb : bool
+        Determines if the last dimension of `data` contains color channels.
+    downsample : str
+        How the levels of the pyramid are downsampled. Either "mean" to
+        average blocks of 2x2 pixels, which avoids aliasing on intensity
+        images, or "nearest" to take every other pixel, which keeps the colors
+        of the labels intact.
+    maxworkers : int
+        The number of threads compressing the tiles.
+    """
+    if downsample not in ("mean", "nearest"):
+        raise ValueError(f"Unknown downsampling method: {downsample}")
+    options = {
+        "photometric": "rgb" if rgb else "minisblack",
+        "tile": (TIFF_TILE_SIZE, TIFF_TILE_SIZE),
+        "compression": "zlib",
+        "maxworkers": maxworkers,
+    }
+    # Regular TIFF files are limited to 4GB
+    with tifffile.TiffWriter(str(path), bigtiff=data.nbytes > 2**31) as tif:
+        tif.write(data, **options)
+        # Images with more dimensions (e.g. z-stacks) are already stored on
+        # multiple pages, so they are not saved as pyramids.
+        if data.ndim == (3 if rgb else 2):
+            level = data
+            while max(level.shape[:2]) > TIFF_TILE_SIZE:
+                if downsample == "mean":
+                    level = downsample_mean(level)
+                else:
+                    level = level[::2, ::2]
+                tif.write(level, subfiletype=1, **options)
+
+
+def save_labels_tiff(
+    path: Union[Path, str],
+    data: np.ndarray,
+    meta: Dict[str, Any],
+    maxworkers: int = TIFF_MAX_WORKERS,
+) -> None:
+    """Saves a labels layer as an RGBA TIFF file readable by TissUUmaps.
+    Each label is colored with the colormap of the layer, see
+    `generate_labels_image`.
+
+    Parameters
+    ----------
+    path : Union[Path, str]
+        The path of the TIFF file to write.
+    data : np.ndarray
+        The labels layer data (an integer image) as provided by Napari.
+    meta : Dict[str, Any]
+        The metadata of the labels layer containing the colormap.
+    maxworkers : int
+        The number of threads compressing the tiles.
+    """
+    # The labels are downsampled without averaging, to keep their colors
+    save_tiff(
+        path,
+        generate_labels_image(data, meta),
+        rgb=True,
+        downsample="nearest",
+        maxworkers=maxworkers,
+    )
+
+
+def save_points_csv(
+    path: Union[Path, str], data: np.ndarray, meta: Dict[str, Any]
+) -> None:
+    """Saves a points layer as a CSV file readable by TissUUmaps.
+    The Napari points are in a different coordinate system (y,x) that is
+    converted to the one of Tissuumaps (x,y). The colors of the individual
+    points are extracted from the metadata.
+
+    Parameters
+    ----------
+    path : Union[Path, str]
+        The path of the CSV file to write.
+    data : np.ndarray
+        The points layer data (an array of coordinates) as provided by Napari.
+    meta : Dict[str, Any]
+        The metadata of the points layer containing the name, colors, symbol
+        and properties of the points.
+    """
+    # Constructing the columns, each of them is converted to strings
+    # on its own to avoid building a mixed-type array of all of them. The
+    # columns are given as lists of Python strings, which the csv writer
+    # iterates faster than NumPy arrays.
+    columns = [
+        data[:, 1].astype(str),
+        data[:, 0].astype(str),
+        rgb2hex(meta["face_color"]),
+        np.asarray(meta["symbol"]).astype(str),
+    ]
+    columns = [c.tolist() for c in np.broadcast_arrays(*columns)]
+    header = ["name", "x", "y", "color", "symbol"]
+    # Extract the properties. They are formatted from Python scalars, like
+    # f-strings do, such that e.g. float32 values keep all their digits.
+    properties = meta.get("properties")
+    if properties:
+        header += list(properties.keys())
+        columns += [
+            list(map(str, np.asarray(prop).tolist()))
+            for prop in properties.values()
+        ]
+    # Saving the csv file. The csv writer formats all the rows in C
+    # and quotes the values that contain commas (e.g. in the names).
+    with open(
+        path, "w", encoding="utf-8", newline="", buffering=2**20
+    ) as points_file:
+        writer = csv.writer(points_file, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(zip(repeat(meta["name"]), *columns))
 
 
 def tmap_writer(
@@ -291,86 +639,94 @@ def tmap_writer(
 
     # Creation of the tmap file
     tmap_cfg = generate_tmap_config(save_path.stem, layer_data)
-    tmap_file = open(save_path / "main.tmap", "w+")
-    savedfilenames.append(tmap_file.name)
-    tmap_file.write(json.dumps(tmap_cfg, indent=4))
-    tmap_file.close()
+    path_tmap = save_path / "main.tmap"
+    with open(path_tmap, "w", encoding="utf-8") as tmap_file:
+        savedfilenames.append(str(path_tmap))
+        json.dump(tmap_cfg, tmap_file, indent=4)
 
     # Shapes have to be combined in the same file
     regions = {}
-    # Saving the files
-    for data, meta, layer_type in layer_data:
-        if layer_type == "image":
-            # The Napari images can directly be saved to tif.
-            image_folder = save_path / "images"
-            image_folder.mkdir(exist_ok=True)
-            path_image = image_folder / f"{meta['name']}.tif"
-            imsave(str(path_image), data)
-            savedfilenames.append(path_image)
-        elif layer_type == "points":
-            # The Napari points are in a different coordinate system (y,x)
-            # that must be converted to Tissuumaps which uses (x,y). The colors
-            # of the individual points are extracted from the metadata.
-            points_folder = save_path / "points"
-            points_folder.mkdir(exist_ok=True)
-            path_points = points_folder / f"{meta['name']}.csv"
-            # Constructing the columns
-            y, x = data[:, 0:1], data[:, 1:2]
-            color = np.array(
-                [[rgb2hex(color)] for color in meta["face_color"]]
-            )
-            symbol = np.array([[meta["symbol"]]] * x.shape[0])
-            points = np.block([x, y, color, symbol])
-            # Extract the properties
-            properties = meta.get("properties")
-            # Saving the csv file manually.
-            points_file = open(path_points, "w+")
-            savedfilenames.append(path_points.name)
-            prop_keys = "," + ",".join(properties.keys()) if properties else ""
-            points_file.write(f"name,x,y,color,symbol{prop_keys}\n")
-            for i, (_x, _y, _color, _symbol) in enumerate(points):
-                points_file.write(
-                    f"{meta['name']},{_x},{_y},{_color},{_symbol}"
+    # Saving the files. The files are written in parallel by a pool of
+    # threads, as encoding the images and writing the files release the GIL.
+    # The folders are created before submitting the files to avoid races.
+    # At most `WRITER_MAX_WORKERS` files are written at once, and they share
+    # the compression threads, so the number of threads and the peak memory
+    # do not grow with the number of CPUs.
+    n_jobs = sum(
+        layer_type in ("image", "points", "labels")
+        for _, _, layer_type in layer_data
+    )
+    pool_size = max(1, min(WRITER_MAX_WORKERS, n_jobs))
+    maxworkers = max(1, TIFF_MAX_WORKERS // pool_size)
+    futures = []
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        for data, meta, layer_type in layer_data:
+            if layer_type == "image":
+                # The Napari images can directly be saved to tif.
+                image_folder = save_path / "images"
+                image_folder.mkdir(exist_ok=True)
+                path_image = image_folder / f"{meta['name']}.tif"
+                futures.append(
+                    executor.submit(
+                        save_tiff,
+                        path_image,
+                        data,
+                        rgb=meta["rgb"],
+                        maxworkers=maxworkers,
+                    )
                 )
-                if properties:
-                    for prop in properties.keys():
-                        points_file.write(f",{properties[prop][i]}")
-                points_file.write("\n")
-            points_file.close()
-        elif layer_type == "labels":
-            # The labels layers may have multiple sub-labels that must be
-            # separated in different images for Tissuumaps to read. Each label
-            # gets a color given by a random colormap from Napari.
-            labels_folder = save_path / "labels"
-            labels_folder.mkdir(exist_ok=True)
-            path_label = labels_folder / f"{meta['name']}.tif"
-            # Recreating the colored image
-            label_layer = Labels(data, **meta)
-            label_img = label_layer.colormap.map(
-                label_layer._raw_to_displayed(data)
-            )
-            label_img_uint8 = (label_img * 255.0).astype(np.uint8)
-            imsave(str(path_label), label_img_uint8)
-            savedfilenames.append(path_label)
-        elif layer_type == "shapes":
-            regions.update(generate_shapes_dict(data, meta))
-        else:
-            logger.warning(
-                f"Layer \"{meta['name']}\" cannot be saved. This type of layer"
-                " ({layer_type}) is not yet implemented."
-            )
+                savedfilenames.append(str(path_image))
+            elif layer_type == "points":
+                points_folder = save_path / "points"
+                points_folder.mkdir(exist_ok=True)
+                path_points = points_folder / f"{meta['name']}.csv"
+                futures.append(
+                    executor.submit(save_points_csv, path_points, data, meta)
+                )
+                savedfilenames.append(str(path_points))
+            elif layer_type == "labels":
+                # The labels layers may have multiple sub-labels that must be
+                # separated in different images for Tissuumaps to read. Each
+                # label gets a color given by a random colormap from Napari.
+                labels_folder = save_path / "labels"
+                labels_folder.mkdir(exist_ok=True)
+                path_label = labels_folder / f"{meta['name']}.tif"
+                # The colored image is recreated by the thread writing it, so
+                # that it overlaps with the writing of the other layers.
+                futures.append(
+                    executor.submit(
+                        save_labels_tiff,
+                        path_label,
+                        data,
+                        meta,
+                        maxworkers=maxworkers,
+                    )
+                )
+                savedfilenames.append(str(path_label))
+            elif layer_type == "shapes":
+                regions.update(generate_shapes_dict(data, meta))
+            else:
+                logger.warning(
+                    f"Layer \"{meta['name']}\" cannot be saved. This type of"
+                    f" layer ({layer_type}) is not yet implemented."
+                )
+    # Raising the errors that happened while writing the files, if any
+    for future in futures:
+        future.result()
 
     # Saving the shapes
     if len(regions) > 0:
         shapes_folder = save_path / "regions"
         shapes_folder.mkdir(exist_ok=True)
         # Saving the json
-        shapes_filename = "regions.json"
-        shapes_file = open(shapes_folder / shapes_filename, "w+")
-        savedfilenames.append(shapes_file.name)
-        shapes_file.write(json.dumps(regions, indent=4))
-        shapes_file.close()
-
-    # Convertion from Path to str
-    savedfilenames = list(map(str, savedfilenames))
+        path_regions = shapes_folder / "regions.json"
+        # The regions are only read by TissUUmaps, and can contain a lot of
+        # coordinates, so they are saved compactly. `json.dumps` uses the C
+        # encoder, while `json.dump` streams the chunks of the pure Python
+        # encoder to the file, so the text is encoded at once and written.
+        path_regions.write_text(
+            json.dumps(regions, separators=(",", ":")), encoding="utf-8"
+        )
+        savedfilenames.append(str(path_regions))
+
     return savedfilenames